@@ -1,41 +1,167 @@
 import os
 import re
+import sys
+import time
+import logging
 import json
-import subprocess
+import argparse
+import hashlib
+from html import escape
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 from datetime import datetime
 from typing import List, Dict, Set, Optional, Tuple
 
 import requests
-from bs4 import BeautifulSoup, Tag
+from requests.adapters import HTTPAdapter
+import lxml.html
+from lxml import etree
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # новый дефолт — под текущую афишу
 AFISHA_URL = os.environ.get("AFISHA_URL", "https://puppet-minsk.by/afisha")
+# база для относительных ссылок карточек
+AFISHA_BASE_URL = AFISHA_URL if AFISHA_URL.endswith("/") else AFISHA_URL + "/"
 
 TELEGRAM_BOT_TOKEN = os.environ["TELEGRAM_BOT_TOKEN"]
 TELEGRAM_CHAT_ID = int(os.environ["TELEGRAM_CHAT_ID"])
-SEEN_FILE = os.environ.get("SEEN_FILE", "data/seen.json")
-DEBUG_PARSE = "1"
-
-def log(msg: str):
-    now = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
-    print(f"{now} {msg}", flush=True)
+# по одному JSON-id на строку; новые id дописываются в конец
+SEEN_FILE = os.environ.get("SEEN_FILE", "data/seen.jsonl")
+# старый формат — JSON-массив в seen.json рядом; переносится при первом чтении
+LEGACY_SEEN_FILE = os.path.splitext(SEEN_FILE)[0] + ".json"
+# ETag / Last-Modified и подпись тела последней обработанной афиши
+CACHE_META_FILE = os.environ.get(
+    "CACHE_META_FILE", os.path.join(os.path.dirname(SEEN_FILE), "cache_meta.json")
+)
+DEBUG_PARSE = os.environ.get("DEBUG_PARSE") == "1"
+# 0 — одна проверка и выход (GitHub Actions), иначе — период опроса в секундах
+CHECK_EVERY_SECONDS = int(os.environ.get("CHECK_EVERY_SECONDS", "0"))
+# лимит Telegram — 4096 символов, оставляем запас
+TELEGRAM_MAX_TEXT = 4000
+# сколько сообщений отправляем параллельно (не больше пула соединений SESSION);
+# лимит Telegram на один чат ~1 сообщение/с, поэтому на 429 ждём retry_after
+TELEGRAM_WORKERS = 4
+TELEGRAM_MAX_ATTEMPTS = 3
+
+# одна сессия на весь процесс: keep-alive и пул соединений
+SESSION = requests.Session()
+SESSION.headers.update({"Connection": "keep-alive"})
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+logging.basicConfig(
+    stream=sys.stdout,
+    level=logging.INFO,
+    format="[%(asctime)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger("puppet_watcher")
+# подробный разбор карточек — только при DEBUG_PARSE=1
+logger.setLevel(logging.DEBUG if DEBUG_PARSE else logging.INFO)
+
+# каталоги, которые уже созданы в этом процессе
+_made_dirs: Set[str] = set()
+
+def _ensure_parent_dir(path: str):
+    d = os.path.dirname(path) or "."
+    if d not in _made_dirs:
+        os.makedirs(d, exist_ok=True)
+        _made_dirs.add(d)
+
+def _seen_line(item_id: str) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(item_id) + b"\n"
+    return json.dumps(item_id, ensure_ascii=False).encode("utf-8") + b"\n"
+
+# оба принимают bytes; ошибки разбора — подклассы ValueError
+_loads = orjson.loads if orjson is not None else json.loads
+
+def _migrate_legacy_seen(path: str) -> Set[str]:
+    """
+    Читает JSON-массив старого формата и один раз переписывает его в SEEN_FILE.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        seen = set(json.load(f))
+    save_seen(seen)
+    logger.info("🔁 %s перенесён в %s (%s id)", path, SEEN_FILE, len(seen))
+    return seen
 
 def load_seen() -> Set[str]:
     if not os.path.exists(SEEN_FILE):
+        if SEEN_FILE != LEGACY_SEEN_FILE and os.path.exists(LEGACY_SEEN_FILE):
+            return _migrate_legacy_seen(LEGACY_SEEN_FILE)
         return set()
+    seen: Set[str] = set()
     try:
-        with open(SEEN_FILE, "r", encoding="utf-8") as f:
-            return set(json.load(f))
+        with open(SEEN_FILE, "rb") as f:
+            if f.read(1) == b"[":
+                # SEEN_FILE всё ещё указывает на JSON-массив
+                return _migrate_legacy_seen(SEEN_FILE)
+            f.seek(0)
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    seen.add(_loads(line))
+                except ValueError:
+                    # недописанная строка (процесс убили посреди записи)
+                    continue
     except Exception:
         return set()
+    return seen
 
 def save_seen(seen: Set[str]):
-    os.makedirs(os.path.dirname(SEEN_FILE), exist_ok=True)
-    with open(SEEN_FILE, "w", encoding="utf-8") as f:
-        json.dump(list(seen), f, ensure_ascii=False, indent=2)
+    """
+    Полностью переписывает файл — используется при переносе старого формата.
+    Пишем во временный файл и подменяем, чтобы не оставить файл обрезанным.
+    Сортируем, чтобы дифф в git был стабильным.
+    """
+    _ensure_parent_dir(SEEN_FILE)
+    tmp = SEEN_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(b"".join(_seen_line(item_id) for item_id in sorted(seen)))
+    os.replace(tmp, SEEN_FILE)
+
+def append_seen(new_ids: List[str]):
+    """
+    Дописываются только id, которых ещё нет в файле, поэтому дублей не бывает
+    и периодическая компактизация не нужна.
+    """
+    if not new_ids:
+        return
+    _ensure_parent_dir(SEEN_FILE)
+    with open(SEEN_FILE, "ab+") as f:
+        data = b"".join(_seen_line(item_id) for item_id in new_ids)
+        # файл оборван без \n — начинаем с новой строки, чтобы не склеиться с обрывком
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+
+def load_cache_meta() -> Dict[str, object]:
+    if not os.path.exists(CACHE_META_FILE):
+        return {}
+    try:
+        with open(CACHE_META_FILE, "r", encoding="utf-8") as f:
+            return dict(json.load(f))
+    except Exception:
+        return {}
 
-def send_telegram(text: str):
+def save_cache_meta(meta: Dict[str, object]):
+    _ensure_parent_dir(CACHE_META_FILE)
+    tmp = CACHE_META_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, CACHE_META_FILE)
+
+def send_telegram(text: str) -> bool:
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {
         "chat_id": TELEGRAM_CHAT_ID,
@@ -44,25 +170,54 @@ def send_telegram(text: str):
         "disable_web_page_preview": True,
     }
     try:
-        r = requests.post(url, json=payload, timeout=10)
-        if not r.ok:
-            log(f"❗ Ошибка отправки в Telegram: {r.text}")
+        for attempt in range(1, TELEGRAM_MAX_ATTEMPTS + 1):
+            r = SESSION.post(url, json=payload, timeout=10)
+            if r.status_code == 429 and attempt < TELEGRAM_MAX_ATTEMPTS:
+                try:
+                    retry_after = int(r.json()["parameters"]["retry_after"])
+                except (ValueError, KeyError, TypeError):
+                    retry_after = 1
+                logger.info("⏳ Telegram просит подождать %s с", retry_after)
+                time.sleep(retry_after)
+                continue
+            if not r.ok:
+                logger.error("❗ Ошибка отправки в Telegram: %s", r.text)
+            return r.ok
     except Exception as e:
-        log(f"❗ Telegram error: {e}")
+        logger.error("❗ Telegram error: %s", e)
+    return False
 
-def fetch_afisha_html() -> Optional[str]:
+def fetch_afisha_html(meta: Dict[str, object]) -> Optional[str]:
+    """
+    Скачивает афишу. Возвращает None при ошибке и при 304 Not Modified;
+    новые ETag / Last-Modified из ответа записываются в meta.
+    """
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:129.0) Gecko/20100101 Firefox/129.0",
         "Accept-Language": "ru,en;q=0.9",
         "Cache-Control": "no-cache",
         "Pragma": "no-cache",
     }
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
     try:
-        resp = requests.get(AFISHA_URL, headers=headers, timeout=25)
-        resp.encoding = resp.apparent_encoding or resp.encoding or "utf-8"
-        return resp.text
+        resp = SESSION.get(AFISHA_URL, headers=headers, timeout=25)
+        if resp.status_code == 304:
+            logger.info("ℹ️ Афиша не изменилась (304)")
+            return None
+        for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified")):
+            value = resp.headers.get(header)
+            if value:
+                meta[key] = value
+        # кодировку берём из Content-Type без chardet по всему телу;
+        # без charset requests подставил бы ISO-8859-1, а сайт отдаёт UTF-8
+        content_type = resp.headers.get("Content-Type", "").lower()
+        encoding = resp.encoding if "charset" in content_type else "utf-8"
+        return resp.content.decode(encoding or "utf-8", errors="replace")
     except Exception as e:
-        log(f"❗ Не удалось скачать афишу: {e}")
+        logger.error("❗ Не удалось скачать афишу: %s", e)
         return None
 
 MONTHS_RU = {
@@ -81,24 +236,43 @@ MONTHS_RU = {
     "декабря": "12", "декабрь": "12",
 }
 
+_WS_RE = re.compile(r"\s+")
+_CONTAINER_RE = re.compile(r"item_mounth-(\d{4})-(\d{2})")
+_DAY_RE = re.compile(r"\b(\d{1,2})\b")
+# длинные формы первыми, чтобы «марта» не находилось как «март»
+_MONTH_RE = re.compile("|".join(map(re.escape, sorted(MONTHS_RU, key=len, reverse=True))))
+
 def _norm_space(s: str) -> str:
     if not s:
         return s
-    s = s.replace("\xa0", " ").replace("\u2002", " ").replace("\u2003", " ").replace("\u2009", " ")
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
-def _extract_year_month_from_container(node: Tag) -> Optional[Tuple[str, str]]:
+    # \s в str-шаблонах уже покрывает NBSP и узкие/широкие пробелы
+    return _WS_RE.sub(" ", s).strip()
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# XPath компилируются один раз; аналог CSS-селекторов прежней версии
+ITEM_XPATH = etree.XPath(f"//*[{_has_class('afisha_listcontainer')}]//*[{_has_class('afisha_item')}]")
+INFO_XPATH = etree.XPath(f".//*[{_has_class('afisha-info')}]")
+DAY_XPATH = etree.XPath(f".//*[{_has_class('afisha-day')}]")
+TIME_XPATH = etree.XPath(f".//*[{_has_class('afisha-time')}]")
+TITLE_XPATH = etree.XPath(f".//*[{_has_class('afisha-title')}]")
+LINK_XPATH = etree.XPath(f".//a[{_has_class('afisha_item-hover')}][@href]")
+MONTH_CLASS_XPATH = etree.XPath("ancestor-or-self::*[contains(@class, 'item_mounth-')]/@class")
+# текст узла без содержимого <script>/<style> — их get_text тоже не берёт
+TEXT_XPATH = etree.XPath(".//text()[not(ancestor::script or ancestor::style)]")
+
+HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+def _extract_year_month_from_container(node: etree._Element) -> Optional[Tuple[str, str]]:
     """
     Ищем ближайшего родителя с классом вида item_mounth-YYYY-MM.
     """
-    cur: Optional[Tag] = node
-    while isinstance(cur, Tag):
-        classes = " ".join(cur.get("class", []))
-        m = re.search(r"item_mounth-(\d{4})-(\d{2})", classes)
+    # XPath отдаёт классы предков в порядке документа — ближайший последний
+    for classes in reversed(MONTH_CLASS_XPATH(node)):
+        m = _CONTAINER_RE.search(classes)
         if m:
             return m.group(1), m.group(2)
-        cur = cur.parent if isinstance(cur.parent, Tag) else None
     return None
 
 def _extract_day_and_month_from_text(text: str) -> Optional[Tuple[str, Optional[str]]]:
@@ -107,72 +281,81 @@ def _extract_day_and_month_from_text(text: str) -> Optional[Tuple[str, Optional[
     """
     t = _norm_space(text).lower()
     # день: первое число
-    m_day = re.search(r"\b(\d{1,2})\b", t)
+    m_day = _DAY_RE.search(t)
     day = m_day.group(1) if m_day else None
     # месяц: слово из словаря (в падеже тоже ок)
-    month_word = None
-    for w in MONTHS_RU.keys():
-        if w in t:
-            month_word = w
-            break
+    m_month = _MONTH_RE.search(t)
+    month_word = m_month.group(0) if m_month else None
     return (day, month_word) if day else None
 
+def _first(xpath: etree.XPath, node: etree._Element) -> Optional[etree._Element]:
+    found = xpath(node)
+    return found[0] if found else None
+
+def _text(node: etree._Element) -> str:
+    # как get_text(" ", strip=True) у BeautifulSoup
+    return " ".join(s.strip() for s in TEXT_XPATH(node) if s.strip())
+
+def _absolute_url(href: str) -> str:
+    # на сайте ссылки на билеты обычно уже абсолютные — urljoin им не нужен
+    if href.startswith(("https://", "http://")):
+        return href
+    return urljoin(AFISHA_BASE_URL, href)
+
 def parse_afisha(html: str) -> List[Dict]:
-    soup = BeautifulSoup(html, "html.parser")
+    try:
+        tree = lxml.html.document_fromstring(html.encode("utf-8"), parser=HTML_PARSER)
+    except etree.ParserError as e:
+        logger.error("❗ Не удалось разобрать HTML афиши: %s", e)
+        return []
 
     results: List[Dict] = []
-    items = soup.select(".afisha_listcontainer .afisha_item")
+    items = ITEM_XPATH(tree)
+    current_year = str(datetime.now().year)
 
-    if DEBUG_PARSE:
-        log(f"🧩 DEBUG: найдено карточек .afisha_item: {len(items)}")
+    logger.debug("🧩 DEBUG: найдено карточек .afisha_item: %s", len(items))
 
     for idx, item in enumerate(items, start=1):
-        if DEBUG_PARSE:
-            log(f"\n🟦 DEBUG: анализ карточки #{idx}")
+        logger.debug("\n🟦 DEBUG: анализ карточки #%s", idx)
 
-        info = item.select_one(".afisha-info")
-        if not info:
-            if DEBUG_PARSE:
-                log("  ⚠️ Нет .afisha-info → пропуск")
+        info = _first(INFO_XPATH, item)
+        if info is None:
+            logger.debug("  ⚠️ Нет .afisha-info → пропуск")
             continue
 
-        p_day = info.select_one(".afisha-day")
-        p_time = info.select_one(".afisha-time")
-        p_title = info.select_one(".afisha-title")
-        a_link = item.select_one("a.afisha_item-hover[href]")
+        p_day = _first(DAY_XPATH, info)
+        p_time = _first(TIME_XPATH, info)
+        p_title = _first(TITLE_XPATH, info)
+        a_link = _first(LINK_XPATH, item)
 
-        if DEBUG_PARSE:
-            log(f"  — day:   {p_day.get_text(strip=True) if p_day else 'нет'}")
-            log(f"  — time:  {p_time.get_text(strip=True) if p_time else 'нет'}")
-            log(f"  — title: {p_title.get_text(strip=True) if p_title else 'нет'}")
-            log(f"  — link:  {a_link.get('href') if a_link else 'нет'}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  — day:   %s", _text(p_day) if p_day is not None else "нет")
+            logger.debug("  — time:  %s", _text(p_time) if p_time is not None else "нет")
+            logger.debug("  — title: %s", _text(p_title) if p_title is not None else "нет")
+            logger.debug("  — link:  %s", a_link.get('href') if a_link is not None else "нет")
 
-        if not (p_day and p_time and p_title and a_link):
-            if DEBUG_PARSE:
-                log("  ❌ Не хватает нужных элементов → пропуск")
+        if p_day is None or p_time is None or p_title is None or a_link is None:
+            logger.debug("  ❌ Не хватает нужных элементов → пропуск")
             continue
 
         # ----- разбор текста -----
-        day_text = p_day.get_text(" ", strip=True)
-        time_text = _norm_space(p_time.get_text(" ", strip=True))
-        title = _norm_space(p_title.get_text(" ", strip=True))
+        day_text = _text(p_day)
+        time_text = _norm_space(_text(p_time))
+        title = _norm_space(_text(p_title))
         href = a_link.get("href", "").strip()
 
         # ----- ищем YYYY-MM в контейнере -----
         ym = _extract_year_month_from_container(item)
-        if DEBUG_PARSE:
-            log(f"  🔍 Контейнер item_mounth-YYYY-MM: {ym}")
+        logger.debug("  🔍 Контейнер item_mounth-YYYY-MM: %s", ym)
 
         year, month_num = ym if ym else (None, None)
 
         # ----- разбираем строку “15 Ноября, Сб” -----
         day_month = _extract_day_and_month_from_text(day_text)
-        if DEBUG_PARSE:
-            log(f"  🔍 День/месяц из текста: {day_month}")
+        logger.debug("  🔍 День/месяц из текста: %s", day_month)
 
         if not day_month:
-            if DEBUG_PARSE:
-                log("  ❌ Не удалось извлечь день/месяц → пропуск")
+            logger.debug("  ❌ Не удалось извлечь день/месяц → пропуск")
             continue
 
         day_num, month_word = day_month
@@ -182,35 +365,30 @@ def parse_afisha(html: str) -> List[Dict]:
             mn = MONTHS_RU.get(month_word.lower())
             if mn:
                 month_num = mn
-                if DEBUG_PARSE:
-                    log(f"  🔧 Месяц по слову '{month_word}': {month_num}")
+                logger.debug("  🔧 Месяц по слову '%s': %s", month_word, month_num)
 
         # ----- если год не найден — ставим текущий -----
         if not year:
-            year = str(datetime.now().year)
-            if DEBUG_PARSE:
-                log(f"  🔧 Год не найден → поставлен текущий {year}")
+            year = current_year
+            logger.debug("  🔧 Год не найден → поставлен текущий %s", year)
 
         # ----- нормализуем день -----
         if day_num and len(day_num) == 1:
             day_num = "0" + day_num
 
         if not (year and month_num and day_num):
-            if DEBUG_PARSE:
-                log("  ❌ Не собрался полный формат даты → пропуск")
+            logger.debug("  ❌ Не собрался полный формат даты → пропуск")
             continue
 
         date_str = f"{day_num}.{month_num}.{year}"
 
-        if DEBUG_PARSE:
-            log(f"  📅 Итоговая дата: {date_str}")
-            log(f"  ⏰ Время:        {time_text}")
+        logger.debug("  📅 Итоговая дата: %s", date_str)
+        logger.debug("  ⏰ Время:        %s", time_text)
 
         # абсолютная ссылка
-        url_abs = urljoin(AFISHA_URL if AFISHA_URL.endswith("/") else AFISHA_URL + "/", href)
+        url_abs = _absolute_url(href)
 
-        if DEBUG_PARSE:
-            log(f"  🔗 Финальная ссылка: {url_abs}")
+        logger.debug("  🔗 Финальная ссылка: %s", url_abs)
 
         item_id = f"{date_str} {time_text} | {title} | {url_abs}"
 
@@ -224,10 +402,157 @@ def parse_afisha(html: str) -> List[Dict]:
             }
         )
 
-        if DEBUG_PARSE:
-            log(f"  ✅ Добавлена карточка → ID: {item_id}")
+        logger.debug("  ✅ Добавлена карточка → ID: %s", item_id)
+
+    logger.debug("\n🟢 DEBUG: итоговое количество разобранных событий: %s", len(results))
 
-    if DEBUG_PARSE:
-        log(f"\n🟢 DEBUG: итоговое количество разобранных событий: {len(results)}")
+    return results
 
-    return results
\ No newline at end of file
+# последний разобранный HTML: хэш тела → результат parse_afisha
+_parse_cache: Dict[str, object] = {}
+
+def parse_afisha_cached(html: str, h: str) -> List[Dict]:
+    """
+    В цикле одна и та же страница приходит часами — повторно её не разбираем.
+    h — хэш тела из _body_hash, считается один раз в check_once.
+    """
+    if _parse_cache.get("hash") == h:
+        logger.debug("🧩 DEBUG: HTML не изменился → берём прошлый разбор")
+        return _parse_cache["items"]
+    items = parse_afisha(html)
+    _parse_cache["hash"] = h
+    _parse_cache["items"] = items
+    return items
+
+def format_item(item: Dict) -> str:
+    return (
+        f"🎭 <b>{escape(item['title'])}</b>\n"
+        f"📅 {escape(item['date'])} {escape(item['time'])}\n"
+        f"🔗 {escape(item['url'])}"
+    )
+
+def _chunk_items(items: List[Dict]) -> List[List[Dict]]:
+    """
+    Группируем события так, чтобы текст одного сообщения не превышал TELEGRAM_MAX_TEXT.
+    """
+    chunks: List[List[Dict]] = []
+    cur: List[Dict] = []
+    cur_len = 0
+    for item in items:
+        n = len(format_item(item)) + 2  # + разделитель "\n\n"
+        if cur and cur_len + n > TELEGRAM_MAX_TEXT:
+            chunks.append(cur)
+            cur, cur_len = [], 0
+        cur.append(item)
+        cur_len += n
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+def _body_hash(html: str) -> str:
+    return hashlib.blake2b(html.encode("utf-8"), digest_size=8).hexdigest()
+
+def check_once():
+    meta = load_cache_meta()
+    saved_meta = dict(meta)
+    html = fetch_afisha_html(meta)
+    if html is None:
+        return
+
+    # сервер может не поддерживать 304, но отдать то же самое тело
+    h = _body_hash(html)
+    if meta.get("body_len") == len(html) and meta.get("body_hash") == h:
+        logger.info("ℹ️ Тело афиши не изменилось")
+        # переписываем файл, только если сменились ETag / Last-Modified
+        if meta != saved_meta:
+            save_cache_meta(meta)
+        return
+    meta["body_len"] = len(html)
+    meta["body_hash"] = h
+
+    items = parse_afisha_cached(html, h)
+    if not items:
+        logger.info("⚠️ В афише не найдено ни одного события")
+        return
+
+    seen = load_seen()
+    # dict по id: порядок афиши сохраняется, дубли карточек на странице схлопываются
+    by_id = {x["id"]: x for x in items}
+    new_ids = by_id.keys() - seen
+    new_items = [x for i, x in by_id.items() if i in new_ids]
+    if not new_items:
+        logger.info("ℹ️ Новых событий нет")
+        save_cache_meta(meta)
+        return
+
+    logger.info("🆕 Новых событий: %s", len(new_items))
+
+    # одно сообщение на пачку событий, пачки уходят параллельно;
+    # в seen попадают только отправленные
+    chunks = _chunk_items(new_items)
+    texts = ["\n\n".join(format_item(x) for x in chunk) for chunk in chunks]
+    if len(chunks) == 1:
+        results = [send_telegram(texts[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(TELEGRAM_WORKERS, len(chunks))) as ex:
+            results = list(ex.map(send_telegram, texts))
+
+    sent_ids: List[str] = []
+    all_sent = True
+    for chunk, ok in zip(chunks, results):
+        if ok:
+            sent_ids.extend(x["id"] for x in chunk)
+        else:
+            all_sent = False
+
+    append_seen(sent_ids)
+    # валидаторы сохраняем только после полной отправки,
+    # иначе следующий запрос получит 304 и неотправленное потеряется
+    if all_sent:
+        save_cache_meta(meta)
+
+def main_loop(every: int = CHECK_EVERY_SECONDS):
+    """
+    Проверки по расписанию от time.monotonic(): период не «уползает»
+    на длительность самой проверки.
+    """
+    logger.info("🚀 Запуск: проверка афиши каждые %s с", every)
+    next_tick = time.monotonic()
+    while True:
+        try:
+            check_once()
+        except Exception as e:
+            logger.error("❗ Ошибка проверки: %s", e)
+        next_tick += every
+        now = time.monotonic()
+        # проверка заняла дольше периода — пропущенные тики не догоняем
+        if next_tick < now:
+            next_tick = now
+        time.sleep(next_tick - now)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Следит за афишей и присылает новые спектакли в Telegram.")
+    parser.add_argument(
+        "--mode",
+        choices=("oneshot", "loop"),
+        default="loop" if CHECK_EVERY_SECONDS > 0 else "oneshot",
+        help="oneshot — одна проверка (GitHub Actions), loop — опрос по кругу (Docker); "
+        "по умолчанию loop, если задан CHECK_EVERY_SECONDS",
+    )
+    parser.add_argument(
+        "--every",
+        type=int,
+        default=CHECK_EVERY_SECONDS,
+        help="период опроса в секундах для --mode loop (по умолчанию CHECK_EVERY_SECONDS)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.mode == "oneshot":
+        check_once()
+        return
+    if args.every <= 0:
+        parser.error("для --mode loop нужен период больше 0: --every или CHECK_EVERY_SECONDS")
+    main_loop(args.every)
+
+if __name__ == "__main__":
+    main()